@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' Checks the tokenizing parser of read_events against the
+former regex based parser (see reader_bench.py).
+
+    python bench/check_parser.py
+
+Exits with a non zero status on the first mismatch.
+'''
+
+import os # path, remove
+import sys # path, exit
+import tempfile # mkstemp
+
+# Runs from a checkout without having to set PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mobylette.reader as reader
+from reader_bench import SAMPLES, log_patt1, log_patt2, read_events_regex
+
+PREFIX = '2019-12-31T15:53:12.583243+01:00 debug01 user.notice lmod: '
+
+# Scibian 8 (old) and Scibian 9 (extended) records
+OLD = PREFIX + ('source=ModUsageTrack, time=1578438000, host=debug01, user=jay, action=load, '
+                'module=gcc/9.2, path=/opt/modulefiles/lib/gcc/9.2\n')
+EXTENDED = PREFIX + ('source=ModUsageTrack, time=1578396915.5, host=debug01, user=john, action=load, '
+                     'module=abc/123, path=/home/john/modulefiles/lib/abc/123, cat=abc, version=123, '
+                     'shell=bash, job_id=1, job_acc=dev, job_part=alpha\n')
+
+def regex_event(line):
+    ''' Returns event parsed by the former regexes '''
+    match = log_patt2.search(line) or log_patt1.search(line)
+    event = match.groupdict()
+    event['timestamp'] = float(event['timestamp'])
+    return event
+
+def reorder(line):
+    ''' Returns line with the fields of its record reversed '''
+    start = line.find(reader.RECORD_MARKER) + len(reader.RECORD_MARKER)
+    tokens = line[start:].rstrip().split(', ')
+    return line[:start] + ', '.join(reversed(tokens)) + '\n'
+
+def extend(line):
+    ''' Returns line with unknown fields added around its record '''
+    start = line.find(reader.RECORD_MARKER) + len(reader.RECORD_MARKER)
+    return line[:start] + 'gpu=0, ' + line[start:].rstrip() + ', extra=1\n'
+
+def check(name, result, expected):
+    ''' Exits with status 1 if result differs from expected '''
+    if result != expected:
+        sys.stderr.write('FAIL {}: {} != {}\n'.format(name, result, expected))
+        sys.exit(1)
+    print('ok {}'.format(name))
+
+def check_line(name, line, expected):
+    ''' Checks line parsed with all fields and with each field '''
+    check(name, reader.FieldParser().parse(line), expected)
+    for field in expected:
+        event = reader.FieldParser([field]).parse(line)
+        subset = dict((key, expected[key]) for key in (field, 'action', 'module'))
+        check('{} ({})'.format(name, field), event, subset)
+
+def check_file(name, lines):
+    ''' Checks events of a file made of lines against the regexes '''
+    fd, path = tempfile.mkstemp(prefix='mobylette')
+    with os.fdopen(fd, 'w') as fp:
+        fp.writelines(lines)
+    try:
+        check(name, list(reader.read_events(path)), list(read_events_regex(path)))
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+
+    check_line('old', OLD, regex_event(OLD))
+    check_line('extended', EXTENDED, regex_event(EXTENDED))
+    check_line('reordered old', reorder(OLD), regex_event(OLD))
+    check_line('reordered extended', reorder(EXTENDED), regex_event(EXTENDED))
+
+    expected = regex_event(EXTENDED)
+    expected.update({'gpu' : '0', 'extra' : '1'})
+    check_line('extra fields', extend(EXTENDED), expected)
+
+    comma = OLD.replace('module=gcc/9.2', 'module=gcc,x/9.2')
+    check_line('comma in value', comma, regex_event(comma))
+    equal = OLD.replace('module=gcc/9.2', 'module=gcc=x/9.2')
+    check_line('equal sign in value', equal, regex_event(equal))
+
+    check('unload', reader.FieldParser().parse(OLD.replace('action=load', 'action=unload')), None)
+    check('no record', reader.FieldParser().parse('debug01 user.notice lmod: unrelated\n'), None)
+
+    no_time = OLD.replace('time=1578438000, ', '')
+    check('no time', reader.date_filter(0)(reader.FieldParser().parse(no_time)), False)
+
+    check_file('mixed file', [OLD, 'unrelated line\n', EXTENDED, OLD, EXTENDED])
+    sample_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample')
+    for sample in SAMPLES:
+        with open(os.path.join(sample_path, sample)) as fp:
+            check_file(sample, fp.readlines())
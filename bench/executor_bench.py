@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' Compares the executors on compressed logs.
+
+    python bench/executor_bench.py [files [copies [cpus [repeat]]]]
+
+The sample datasets are concatenated `copies` times into `files`
+gzip logs which are counted, as `mobylette` does by default, with
+each executor using `cpus` workers. The best time out of `repeat`
+runs is reported, pool start up included, along with the executor
+automatic selection picks.
+'''
+
+import os # path, remove
+import sys # argv, path
+import gzip # open
+import tempfile # mkstemp
+import timeit # default_timer
+
+# Runs from a checkout without having to set PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mobylette.api import aggregate
+from mobylette.aggregator import UniqueAggregator
+from mobylette.executor import create_executor, default_cpus, input_size, select_executor
+from reader_bench import SAMPLES
+
+def create_logs(files, copies):
+    ''' Returns paths of temporary gzip logs made of the samples '''
+    sample_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample')
+    data = ''
+    for name in SAMPLES:
+        with open(os.path.join(sample_path, name)) as fp:
+            data += fp.read()
+    paths = []
+    for i in range(files):
+        fd, path = tempfile.mkstemp(prefix='mobylette', suffix='.gz')
+        os.close(fd)
+        with gzip.open(path, 'wt') as fp:
+            for j in range(copies):
+                fp.write(data)
+        paths.append(path)
+    return paths
+
+def run(name, paths, cpus, repeat):
+    ''' Counts modules found in paths with executor name and
+    prints the best elapsed time out of repeat runs.
+    '''
+    best = None
+    for i in range(repeat):
+        start = timeit.default_timer()
+        with create_executor(paths, name, cpus) as executor:
+            aggregate(paths, UniqueAggregator(), map=executor.map)
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('{:<8} {:>3} workers {:>8.3f} s'.format(name, executor.cpus, best))
+
+if __name__ == "__main__":
+
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    cpus = int(sys.argv[3]) if len(sys.argv) > 3 else default_cpus()
+    repeat = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+    paths = create_logs(files, copies)
+    try:
+        print('{} gzip files, {} MiB uncompressed, {} cpus'.format(
+              files, input_size(paths) // (1024 * 1024), cpus))
+        for name in ('serial', 'thread', 'process'):
+            run(name, paths, cpus, repeat)
+        print('auto selects: {}'.format(select_executor(paths, cpus)))
+    finally:
+        for path in paths:
+            os.remove(path)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' Compares the tokenizing parser of read_events with the
+former regex based parser (read_events_regex).
+
+    python bench/reader_bench.py [copies [repeat]]
+
+The sample datasets are concatenated `copies` times into a
+temporary file which is then read `repeat` times by each
+parser, the best time being reported.
+'''
+
+import os # path, remove
+import re # compile
+import sys # argv, path
+import tempfile # mkstemp
+import timeit # default_timer
+
+# Runs from a checkout without having to set PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import mobylette.reader as reader
+
+SAMPLES = ['dataset1', 'dataset2']
+
+log_patt1 = re.compile(r"""lmod:[ ]
+                       source=ModUsageTrack,[ ]
+                       time=(?P<timestamp>[0-9]+.[0-9]*),[ ]
+                       host=(?P<host>[\S]+),[ ]
+                       user=(?P<user>[\S]+),[ ]
+                       action=(?P<action>load),[ ]
+                       module=(?P<module>[\S]+),[ ]
+                       path=(?P<path>[\S]+)
+                       """, re.VERBOSE)
+
+log_patt2 = re.compile(r"""source=ModUsageTrack,[ ]
+                       time=(?P<timestamp>[0-9]+.[0-9]*),[ ]
+                       host=(?P<host>[\S]+),[ ]
+                       user=(?P<user>[\S]+),[ ]
+                       action=(?P<action>load),[ ]
+                       module=(?P<module>[\S]+),[ ]
+                       path=(?P<path>[\S]+),[ ]
+                       cat=(?P<cat>[\S]+),[ ]
+                       version=(?P<version>[\S]+),[ ]
+                       shell=(?P<shell>[\S]+),[ ]
+                       job_id=(?P<job_id>[0-9]+),[ ]
+                       job_acc=(?P<job_acc>[\S]+),[ ]
+                       job_part=(?P<job_part>[\S]+)
+                       """, re.VERBOSE)
+
+def read_events_regex(file):
+    ''' Yields Lmod events found in log file.
+    Former implementation of mobylette.reader.read_events,
+    based on log_patt1 and log_patt2.
+    '''
+    with reader._open_file(file) as fp:
+        for line in fp:
+            match = log_patt2.search(line)
+            if match is None:
+                match = log_patt1.search(line)
+                if match is None:
+                    continue
+            event = match.groupdict()
+            event['timestamp'] = float(event['timestamp'])
+            yield event
+
+def create_log(copies):
+    ''' Returns path of temporary log file made of the samples '''
+    sample_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample')
+    lines = []
+    for name in SAMPLES:
+        with open(os.path.join(sample_path, name)) as fp:
+            lines.extend(fp.readlines())
+    fd, path = tempfile.mkstemp(prefix='mobylette')
+    with os.fdopen(fd, 'w') as fp:
+        for i in range(copies):
+            fp.writelines(lines)
+    return path
+
+def run(name, read, repeat):
+    ''' Consumes events returned by read and prints
+    the best elapsed time out of repeat runs.
+    '''
+    best = None
+    for i in range(repeat):
+        start = timeit.default_timer()
+        count = sum(1 for event in read())
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('{:<28} {:>8} events {:>8.3f} s'.format(name, count, best))
+
+if __name__ == "__main__":
+
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    path = create_log(copies)
+    try:
+        run('regex', lambda: read_events_regex(path), repeat)
+        run('tokenizer (all fields)', lambda: reader.read_events(path), repeat)
+        run('tokenizer (module, job_id)', lambda: reader.read_events(path, ['module', 'job_id']), repeat)
+    finally:
+        os.remove(path)
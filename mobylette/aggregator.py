@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' Implements Aggregator classes '''
+
+import copy
+
+class Aggregator(object):
+    ''' Collects distinct pairs out of Lmod events.
+
+    Subclasses implement `key`, which turns an event into
+    a `(first, second)` tuple or None when the event should
+    be ignored. `first` is what gets counted (a module, a
+    category, ...) and `second` what makes it distinct (an
+    user, a job, ...). Aggregators filled in different
+    threads or processes are combined with `merge`.
+
+    `fields` lists the event fields `key` reads, so that
+    only these are extracted from the logs (None for all).
+    '''
+
+    fields = None
+
+    def __init__(self):
+        self.pairs = set()
+
+    def key(self, event):
+        ''' Returns pair for event, None to skip it '''
+        raise NotImplementedError
+
+    def empty(self):
+        ''' Returns an empty aggregator of the same kind '''
+        other = copy.copy(self)
+        other.pairs = set()
+        return other
+
+    def update(self, events):
+        ''' Adds the pairs of all given events '''
+        for event in events:
+            pair = self.key(event)
+            if pair is not None:
+                self.pairs.add(pair)
+        return self
+
+    def merge(self, other):
+        ''' Adds the pairs collected by another aggregator '''
+        self.pairs.update(other.pairs)
+        return self
+
+    def result(self):
+        ''' Returns dictionary of distinct values per key '''
+        bodies = {}
+        for first, second in self.pairs:
+            bodies.setdefault(first, []).append(second)
+        return bodies
+
+    def counts(self):
+        ''' Returns dictionary of number of distinct values per key '''
+        return dict((first, len(second)) for first, second in self.result().items())
+
+class UniqueAggregator(Aggregator):
+    ''' Counts modules loaded by distinct users or jobs.
+
+    uniq - 'users' or 'jobs'
+    group - None, 'cat' (module category) or 'path' (first
+            directory of the module path)
+    '''
+
+    def __init__(self, uniq='jobs', group=None):
+        super(UniqueAggregator, self).__init__()
+        if uniq not in ('users', 'jobs'):
+            raise ValueError('uniq must be users or jobs: {}'.format(uniq))
+        if group not in (None, 'cat', 'path'):
+            raise ValueError('group must be cat or path: {}'.format(group))
+        self.uniq = uniq
+        self.group = group
+        self.field = 'user' if uniq == 'users' else 'job_id'
+        self.fields = ('module', self.field) + ((group, ) if group else ())
+
+    def key(self, event):
+        value = event.get(self.field)
+        if value is None:
+            return None
+        pair = (event['module'], value)
+        if self.group == 'cat':
+            if event.get('cat') is None:
+                return None
+            pair = (event['cat'], pair)
+        elif self.group == 'path':
+            path = event.get('path')
+            if path is None:
+                return None
+            pair = (path[:path.find('/', 1)], pair)
+        return pair
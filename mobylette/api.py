@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' In-process API for counting Lmod module loads.
+
+    from mobylette.api import aggregate
+    from mobylette.aggregator import UniqueAggregator
+
+    result = aggregate(['sample/dataset1', 'sample/dataset2'], UniqueAggregator('users', 'cat'))
+    result.counts()
+    # {'abc': 1, 'gcc': 1, 'ifaible': 3, 'ifort': 3, 'python': 2}
+
+Files are read independently, each one by `aggregate_file`,
+and the partial aggregators merged. Any map-like callable
+(`Pool.map`, `ThreadPoolExecutor.map`, the `map` method of
+the executors in `mobylette.executor`, ...) can be given to
+`aggregate` in order to read the files concurrently. When a
+process pool is used, aggregators must be picklable, that
+is, defined at module level.
+'''
+
+import mobylette.reader as reader
+from mobylette.aggregator import UniqueAggregator
+
+def aggregate_file(params):
+    ''' Reads log file into an aggregator.
+    params is a tuple (file, aggregator, start_date, end_date, module)
+    where aggregator is filled with the events that pass the
+    filters. The aggregator is returned.
+    '''
+    file, aggregator, start_date, end_date, module = params
+    fields = aggregator.fields
+    if fields is not None:
+        fields = set(fields)
+    predicates = []
+    if start_date is not None or end_date is not None:
+        predicates.append(reader.date_filter(start_date, end_date))
+        if fields is not None:
+            fields.add('timestamp')
+    if module is not None:
+        predicates.append(reader.module_filter(module))
+    events = reader.read_events(file, fields)
+    return aggregator.update(reader.filter_events(events, *predicates))
+
+def aggregate(files, aggregator=None, start_date=None, end_date=None, module=None, map=map):
+    ''' Reads all files and returns aggregator holding the result.
+    aggregator defaults to a UniqueAggregator counting modules
+    loaded in distinct jobs. Each file is read into an empty copy
+    of aggregator, using map, and then merged into aggregator.
+    '''
+    if aggregator is None:
+        aggregator = UniqueAggregator()
+    params = [(file, aggregator.empty(), start_date, end_date, module) for file in files]
+    for partial in map(aggregate_file, params):
+        aggregator.merge(partial)
+    return aggregator
@@ -126,6 +126,11 @@ class ParseArgs(object):
     parser.add_argument('-cpus', action='store', dest="cpus", type=int,
                         help=argparse.SUPPRESS)
 
+    # How files are read: serially, by a pool of threads or a pool of processes.
+    # The default is to choose according to the number and size of the files.
+    parser.add_argument('-executor', action='store', choices=['auto', 'serial', 'thread', 'process'],
+                        dest="executor", default='auto', help=argparse.SUPPRESS)
+
     # Color fo the bars in the chart
     parser.add_argument('-chart-color', action='store', dest="chart_color",
                         help=argparse.SUPPRESS)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#                                                                            #
+#  This file is part of the mobylette parsing tool.                          #
+#        Copyright (C) 2019 EDF SA                                           #
+#                                                                            #
+#  mobylette is free software: you can redistribute it and/or modify         #
+#  it under the terms of the GNU General Public License as published by      #
+#  the Free Software Foundation, either version 3 of the License, or         #
+#  (at your option) any later version.                                       #
+#                                                                            #
+#  mobylette is distributed in the hope that it will be useful,              #
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of            #
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the              #
+#  GNU General Public License for more details.                              #
+#                                                                            #
+#  You should have received a copy of the GNU General Public License         #
+#  along with mobyllette. If not, see <http://www.gnu.org/licenses/>.        #
+#                                                                            #
+##############################################################################
+''' Implements Executor classes
+
+An executor maps a function over a list of parameters, either
+serially, in a pool of threads or in a pool of processes. Its
+`map` method can be given to `mobylette.api.aggregate`.
+
+Parsing holds the GIL, inflating compressed logs taking little
+of the time, so automatic selection never picks threads: they
+are only used when asked for.
+'''
+
+import os # path, SEEK_END
+import struct # unpack
+import multiprocessing as mp # Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from math import floor
+
+# Below this amount of data (or with a single file) files are
+# read serially, as starting a pool would cost more than it saves.
+# Compressed files count for their uncompressed size.
+SERIAL_MAX_BYTES = 32 * 1024 * 1024
+
+class Executor(object):
+    ''' Base class of executors.
+    Executors can be used as context managers, the
+    pool (if any) being released on exit.
+    '''
+
+    name = None
+
+    def __init__(self, cpus):
+        self.cpus = cpus
+
+    def map(self, func, iterable):
+        ''' Returns list of func applied to each item '''
+        raise NotImplementedError
+
+    def close(self):
+        ''' Releases resources held by executor '''
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SerialExecutor(Executor):
+    ''' Runs everything in the calling process '''
+
+    name = 'serial'
+
+    def __init__(self, cpus=1):
+        super(SerialExecutor, self).__init__(1)
+
+    def map(self, func, iterable):
+        return [func(item) for item in iterable]
+
+class PoolExecutor(Executor):
+    ''' Base class of executors running functions in a
+    multiprocessing pool. Subclasses implement `_create_pool`.
+    '''
+
+    def __init__(self, cpus):
+        super(PoolExecutor, self).__init__(cpus)
+        self.pool = self._create_pool()
+
+    def _create_pool(self):
+        ''' Returns pool of self.cpus workers '''
+        raise NotImplementedError
+
+    def map(self, func, iterable):
+        return self.pool.map(func, iterable)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+class ThreadExecutor(PoolExecutor):
+    ''' Runs functions in a pool of threads '''
+
+    name = 'thread'
+
+    def _create_pool(self):
+        return ThreadPool(processes=self.cpus)
+
+class ProcessExecutor(PoolExecutor):
+    ''' Runs functions in a pool of processes '''
+
+    name = 'process'
+
+    def _create_pool(self):
+        return mp.Pool(processes=self.cpus)
+
+EXECUTORS = dict((executor.name, executor) for executor in (SerialExecutor, ThreadExecutor, ProcessExecutor))
+
+def default_cpus():
+    ''' Returns 75% of the existing cores (at least one) '''
+    return max(1, int(floor(mp.cpu_count() * 0.75)))
+
+def data_size(file):
+    ''' Returns the amount of data read out of file. For gzip
+    files it is taken from the ISIZE trailer (uncompressed size
+    modulo 4 GiB, last member only), never less than the size
+    on disk.
+    '''
+    size = os.path.getsize(file)
+    with open(file, 'rb') as fp:
+        if fp.read(2) != b'\x1f\x8b' or size < 18:
+            return size
+        fp.seek(-4, os.SEEK_END)
+        isize = struct.unpack('<I', fp.read(4))[0]
+    return max(size, isize)
+
+def input_size(files):
+    ''' Returns the amount of data read out of files '''
+    return sum(data_size(file) for file in files)
+
+def select_executor(files, cpus=None):
+    ''' Returns name of the executor best suited to read files.
+    Small inputs are read serially, the others by processes.
+    '''
+    if cpus is None:
+        cpus = default_cpus()
+    # No need to look at the files when their number decides
+    if cpus <= 1 or len(files) <= 1:
+        return 'serial'
+    if input_size(files) < SERIAL_MAX_BYTES:
+        return 'serial'
+    return 'process'
+
+def create_executor(files, name='auto', cpus=None):
+    ''' Returns executor used to read files.
+    name is one of 'auto', 'serial', 'thread' or 'process'.
+    Pools never use more workers than there are files.
+    '''
+    if cpus is None:
+        cpus = default_cpus()
+    if name == 'auto':
+        name = select_executor(files, cpus)
+    if name not in EXECUTORS:
+        raise ValueError('unknown executor: {}'.format(name))
+    return EXECUTORS[name](max(1, min(cpus, len(files))))
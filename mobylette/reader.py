@@ -19,33 +19,6 @@
 #                                                                            #
 ##############################################################################
 
-import re
-
-log_patt1 = re.compile(r"""lmod:[ ]
-                       source=ModUsageTrack,[ ]
-                       time=(?P<timestamp>[0-9]+.[0-9]*),[ ]
-                       host=(?P<host>[\S]+),[ ]
-                       user=(?P<user>[\S]+),[ ]
-                       action=(?P<action>load),[ ]
-                       module=(?P<module>[\S]+),[ ]
-                       path=(?P<path>[\S]+)
-                       """, re.VERBOSE)
-
-log_patt2 = re.compile(r"""source=ModUsageTrack,[ ]
-                       time=(?P<timestamp>[0-9]+.[0-9]*),[ ]
-                       host=(?P<host>[\S]+),[ ]
-                       user=(?P<user>[\S]+),[ ]
-                       action=(?P<action>load),[ ]
-                       module=(?P<module>[\S]+),[ ]
-                       path=(?P<path>[\S]+),[ ]
-                       cat=(?P<cat>[\S]+),[ ]
-                       version=(?P<version>[\S]+),[ ]
-                       shell=(?P<shell>[\S]+),[ ]
-                       job_id=(?P<job_id>[0-9]+),[ ]
-                       job_acc=(?P<job_acc>[\S]+),[ ]
-                       job_part=(?P<job_part>[\S]+)
-                       """, re.VERBOSE)
-
 def _open_file(file):
     ''' Returns correct open command.
        Checks if file is compressed and returns the
@@ -58,162 +31,137 @@ def _open_file(file):
 
     if is_gz_file(file):
         from gzip import open as open_gzip
-        result = open_gzip(file)
+        result = open_gzip(file, 'rt')
     else:
         result = open(file)
     return(result)
 
-def read_users(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct users.
-    '''
-    dic = {}
-    file, start_date, end_date, module = params
-    with _open_file(file) as fp:
-        for line in fp:
-            if log_patt1.search(line) is not None:
+# Lmod records start with this marker. Fields are `key=value` tokens
+# separated by `, `, their number and order depending on the Lmod
+# version (Scibian 8 writes six of them, Scibian 9 twelve).
+RECORD_MARKER = 'source=ModUsageTrack, '
 
-                if module is not None:
-                    if log_patt1.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt1.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt1.search(line).groupdict()['timestamp']) > end_date:
-                        continue
+# Log keys whose event name differs
+FIELD_NAMES = {'time' : 'timestamp'}
 
-                dic[ (log_patt1.search(line).groupdict()['module'], log_patt1.search(line).groupdict()['user']) ] = True
-    return {file : dic.keys()}
+class FieldParser(object):
+    ''' Extracts fields out of Lmod `ModUsageTrack` records.
 
-def read_users_cat(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct users. Results
-    are grouped by category
-    '''
-    dic = {}
-    file, start_date, end_date, module = params
-    with _open_file(file) as fp:
-        for line in fp:
-            if log_patt2.search(line) is not None:
-
-                if module is not None:
-                    if log_patt2.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) > end_date:
-                        continue
+    fields - event names to extract (None extracts them all).
+             Events missing one of them lack the corresponding key.
 
-                dic[ (log_patt2.search(line).groupdict()['cat'],
-                     (log_patt2.search(line).groupdict()['module'], log_patt2.search(line).groupdict()['user'])) ] = True
-    return {file : dic.keys()}
-
-def read_users_path(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct users. Results
-    are grouped by path.
+    Wanted fields are looked up by key with str.find instead of
+    matching the whole record, so their order does not matter and
+    unknown fields are skipped. Old and extended records can thus
+    be mixed in the same file.
     '''
-    dic = {}
-    file, start_date, end_date, module = params
-    with _open_file(file) as fp:
-        for line in fp:
-            if log_patt2.search(line) is not None:
-
-                if module is not None:
-                    if log_patt2.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) > end_date:
-                        continue
-
-                path = log_patt2.search(line).groupdict()['path']
-                dic[ (path[:path.find('/',1)],
-                     (log_patt2.search(line).groupdict()['module'], log_patt2.search(line).groupdict()['user'])) ] = True
-    return {file : dic.keys()}
 
-def read_jobs(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct jobs.
+    def __init__(self, fields=None):
+        self.keys = None
+        if fields is not None:
+            names = dict((name, key) for key, name in FIELD_NAMES.items())
+            fields = set(fields) | set(['action', 'module'])
+            self.keys = [(', ' + names.get(name, name) + '=', name) for name in fields]
+
+    def _tokenize(self, record):
+        ''' Returns event holding all fields of record '''
+        record = record.rstrip()
+        # Keys and values alternate once `, ` is turned into `=`,
+        # unless some value holds `=` or some token lacks it.
+        parts = record.replace(', ', '=').split('=')
+        if len(parts) == 2 * (record.count(', ') + 1):
+            pairs = iter(parts)
+            event = dict(zip(pairs, pairs))
+        else:
+            event = dict(token.partition('=')[::2] for token in record.split(', '))
+        for key, name in FIELD_NAMES.items():
+            if key in event:
+                event[name] = event.pop(key)
+        return event
+
+    def parse(self, line, start=None):
+        ''' Returns event found in line, None if line
+        does not hold a module load record. start is
+        the offset of RECORD_MARKER in line, if known.
+        '''
+        if start is None:
+            start = line.find(RECORD_MARKER)
+            if start < 0:
+                return None
+        if self.keys is None:
+            event = self._tokenize(line[start + len(RECORD_MARKER):])
+        else:
+            # The marker ends with `, ` so the first field is found too
+            event = {}
+            for key, name in self.keys:
+                begin = line.find(key, start)
+                if begin < 0:
+                    continue
+                begin += len(key)
+                end = line.find(', ', begin)
+                if end < 0:
+                    event[name] = line[begin:].rstrip()
+                else:
+                    event[name] = line[begin:end]
+        if event.get('action') != 'load' or 'module' not in event:
+            return None
+        if 'timestamp' in event:
+            try:
+                event['timestamp'] = float(event['timestamp'])
+            except ValueError:
+                return None
+        return event
+
+def read_events(file, fields=None):
+    ''' Yields Lmod events found in log file.
+    Each event is a dictionary holding the fields of a
+    `ModUsageTrack` entry (restricted to fields if given),
+    `time` being renamed `timestamp` and converted to float.
+    Both old and extended Lmod formats are read, even when
+    mixed in the same file. Giving the fields needed is much
+    faster than extracting all of them.
     '''
-    dic = {}
-    file, start_date, end_date, module = params
+    parse = FieldParser(fields).parse
     with _open_file(file) as fp:
         for line in fp:
-            if log_patt2.search(line) is not None:
-
-                if module is not None:
-                    if log_patt2.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) > end_date:
-                        continue
-
-                dic[ (log_patt2.search(line).groupdict()['module'], log_patt2.search(line).groupdict()['job_id']) ] = True
-    return {file : dic.keys()}
-
-def read_jobs_cat(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct jobs. Results
-    are grouped by category.
+            # Most lines of system logs are not Lmod records
+            start = line.find(RECORD_MARKER)
+            if start < 0:
+                continue
+            event = parse(line, start)
+            if event is not None:
+                yield event
+
+def date_filter(start_date=None, end_date=None):
+    ''' Returns predicate retaining events loaded
+    between start_date and end_date (timestamps).
+    Events without timestamp are rejected.
     '''
-    dic = {}
-    file, start_date, end_date, module = params
-    with _open_file(file) as fp:
-        for line in fp:
-            if log_patt2.search(line) is not None:
-
-                if module is not None:
-                    if log_patt2.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) > end_date:
-                        continue
-
-                dic[ (log_patt2.search(line).groupdict()['cat'],
-                     (log_patt2.search(line).groupdict()['module'], log_patt2.search(line).groupdict()['job_id'])) ] = True
-    return {file : dic.keys()}
-
-def read_jobs_path(params):
-    ''' Reads log file.
-    This function will count the number of modules
-    that have been loaded by distinct jobs. Results
-    are grouped by path.
+    def predicate(event):
+        timestamp = event.get('timestamp')
+        if timestamp is None:
+            return False
+        if start_date is not None and timestamp < start_date:
+            return False
+        if end_date is not None and timestamp > end_date:
+            return False
+        return True
+    return predicate
+
+def module_filter(module):
+    ''' Returns predicate retaining events whose
+    module belongs to the given list of modules.
     '''
-    dic = {}
-    file, start_date, end_date, module = params
-    with _open_file(file) as fp:
-        for line in fp:
-            if log_patt2.search(line) is not None:
-
-                if module is not None:
-                    if log_patt2.search(line).groupdict()['module'] not in module:
-                        continue
-                if start_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) < start_date:
-                        continue
-                if end_date is not None:
-                    if float(log_patt2.search(line).groupdict()['timestamp']) > end_date:
-                        continue
-
-                path = log_patt2.search(line).groupdict()['path']
-                dic[ (path[:path.find('/',1)],
-                     (log_patt2.search(line).groupdict()['module'], log_patt2.search(line).groupdict()['job_id'])) ] = True
-    return {file : dic.keys()}
-
+    def predicate(event):
+        return event['module'] in module
+    return predicate
+
+def filter_events(events, *predicates):
+    ''' Yields events satisfying all predicates.
+    Predicates are callables receiving an event and
+    returning a boolean, such as the ones returned by
+    date_filter and module_filter.
+    '''
+    for event in events:
+        if all(predicate(event) for predicate in predicates):
+            yield event